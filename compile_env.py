@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Environment Compiler
+Bakes the values from .env into _env_baked.py so deployed runs can skip python-dotenv at startup.
+"""
+
+import sys
+from pathlib import Path
+
+BAKED_ENV_FILE = Path(__file__).parent / "_env_baked.py"
+
+
+def compile_env(env_file=".env", output_file=BAKED_ENV_FILE):
+    """
+    Write a Python module that seeds os.environ with the values from a .env file.
+
+    Args:
+        env_file: Path to the .env file to compile
+        output_file: Path of the generated module
+
+    Returns:
+        Path: Path to the generated module
+    """
+    from dotenv import dotenv_values
+
+    env_file = Path(env_file)
+    if not env_file.exists():
+        raise FileNotFoundError(f"Environment file not found: {env_file}")
+
+    lines = [
+        '"""Generated by compile_env.py from .env. Contains secrets: do not edit or commit."""',
+        "import os",
+        "",
+    ]
+    for key, value in dotenv_values(env_file).items():
+        if value is not None:
+            lines.append(f"os.environ.setdefault({key!r}, {value!r})")
+
+    output_file = Path(output_file)
+    output_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return output_file
+
+
+def main():
+    """Main function to handle command-line usage."""
+    env_file = sys.argv[1] if len(sys.argv) > 1 else ".env"
+
+    try:
+        output_file = compile_env(env_file)
+    except FileNotFoundError as e:
+        print(f"[✗] Error: {e}")
+        sys.exit(1)
+
+    print(f"[✓] Compiled {env_file} → {output_file}")
+    print("[i] Set VIDEO_ANALYZER_SKIP_ENV=1 to skip both the baked module and .env")
+
+
+if __name__ == "__main__":
+    main()
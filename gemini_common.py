@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Shared Gemini Helpers
+Logging setup, API key lookup, the shared client, atomic writes, response streaming and the
+system-instruction context cache used by both the video analyzer and the sequence generator.
+"""
+
+import sys
+import os
+import asyncio
+import time
+import functools
+import hashlib
+import importlib.util
+import itertools
+import logging
+import threading
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# Lifetime of the server-side context cache holding the system instruction
+CACHE_TTL_SECONDS = 3600
+
+# Root of every on-disk cache: finished results, the upload reuse map and downsampled videos
+CACHE_ROOT = Path.home() / ".cache" / "video_analyzer"
+
+# Loggers whose progress messages the CLIs show; scripts run as __main__
+_APP_LOGGERS = ("gemini_common", "video_analyzer", "__main__")
+
+
+def configure_logging(quiet=False):
+    """
+    Show this project's progress messages while keeping third-party loggers quiet.
+
+    The root logger stays at WARNING so httpx's per-request lines and
+    google-genai's per-call notices don't interleave with the CLI output;
+    only the project's own loggers are raised to INFO (left at WARNING when quiet).
+    """
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    for name in _APP_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING if quiet else logging.INFO)
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_api_key():
+    """
+    Load the environment once per process and return GEMINI_API_KEY (or None).
+
+    A module baked by compile_env.py is preferred over parsing .env with
+    python-dotenv; VIDEO_ANALYZER_SKIP_ENV skips both.
+    """
+    if not os.environ.get('VIDEO_ANALYZER_SKIP_ENV'):
+        try:
+            import _env_baked  # noqa: F401 - seeds os.environ on import
+        except ImportError:
+            from dotenv import load_dotenv
+            load_dotenv()
+    return os.environ.get('GEMINI_API_KEY')
+
+
+def import_genai():
+    """Import google-genai on first use so importing the scripts (and --help) stays cheap."""
+    try:
+        from google import genai
+        from google.genai import types
+        from google.genai import errors
+    except ImportError:
+        print("Error: google-genai is not installed.")
+        print("Please install it using: pip install google-genai")
+        sys.exit(1)
+    return genai, types, errors
+
+
+# Connection pool size for the shared client; matches analyze_many's default concurrency with headroom
+MAX_CONNECTIONS = 32
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key):
+    """
+    Return a process-wide genai.Client for api_key so connection pools are shared.
+
+    The httpx limits only bound the httpx transports. When aiohttp is
+    installed, google-genai's async client uses it instead and ignores
+    httpx.Limits (aiohttp's own connector pools up to 100 connections), so the
+    async limits are passed only when the async client will use httpx.
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            import httpx
+            genai, types, _ = import_genai()
+            limits = httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                  max_keepalive_connections=MAX_CONNECTIONS)
+            async_client_args = None
+            if importlib.util.find_spec("aiohttp") is None:
+                async_client_args = {"limits": limits}
+            client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    client_args={"limits": limits},
+                    async_client_args=async_client_args,
+                ),
+            )
+            _clients[api_key] = client
+        return client
+
+
+def write_atomic(path, text):
+    """Write text via a temp file + os.replace so readers never see a partial file."""
+    path = Path(path)
+    tmp_file = path.with_name(path.name + '.tmp')
+    with open(tmp_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def stream_text(stream, output_file=None):
+    """
+    Collect the text of a streamed Gemini response.
+
+    When output_file is given, each chunk is written to output_file + ".tmp"
+    as soon as it arrives and the temp file replaces output_file once the
+    stream is complete.
+
+    Args:
+        stream: Iterator returned by generate_content_stream
+        output_file: Optional path to stream the text into
+
+    Returns:
+        str: The full response text
+    """
+    chunks = []
+    out = None
+    if output_file:
+        output_file = Path(output_file)
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        out = open(tmp_file, 'w', encoding='utf-8')
+    try:
+        for chunk in stream:
+            if not chunk.text:
+                continue
+            chunks.append(chunk.text)
+            if out:
+                out.write(chunk.text)
+                out.flush()
+    finally:
+        if out:
+            out.close()
+    if out:
+        os.replace(tmp_file, output_file)
+
+    return "".join(chunks)
+
+
+class ContextCachedModel:
+    """
+    Base for Gemini callers that send the same system instruction with every request.
+
+    Batches (more than one request in flight) keep the instruction in an
+    explicit server-side context cache so each request only pays the cached
+    rate for it. Single requests send it inline: creating, using once and
+    deleting a cache costs two extra round trips and bills the prompt twice.
+    Finished results are also memoized on disk under result_cache_dir,
+    keyed by the input's content and the settings that shape the response.
+
+    Subclasses set client, model, temperature, result_cache_dir, _types and
+    _errors, implement _system_instruction(), and call
+    _enable_context_cache() for batches.
+    """
+    # Per-process sequence number so outputs finished in the same second get distinct names
+    _output_counter = itertools.count(1)
+    # Directory of finished results keyed by input content hash
+    result_cache_dir = None
+    # Create an explicit context cache (set by the batch paths)
+    _context_caching = False
+    # Server-side context cache for the system instruction (created on first use)
+    _cache = None
+    _cache_expires = 0.0
+    _cache_disabled = False
+    # In-flight async caches.create shared by concurrent requests
+    _cache_creation = None
+    # Generation config reused across calls while the context cache is unchanged
+    _config = None
+    _config_cache_name = None
+
+    def _system_instruction(self):
+        """Return the system instruction sent with every request."""
+        raise NotImplementedError
+
+    def _result_cache_path(self, *inputs):
+        """
+        Return the cached-result path for inputs (bytes or str) under the current settings.
+
+        The key covers the inputs plus everything else that shapes the
+        response: the system instruction text, model and temperature. Editing
+        a prompt therefore invalidates old results.
+        """
+        key = hashlib.sha256()
+        for part in (*inputs, self._system_instruction(), self.model, str(self.temperature)):
+            key.update(part if isinstance(part, bytes) else part.encode('utf-8'))
+        return Path(self.result_cache_dir) / f"{key.hexdigest()}.md"
+
+    def _load_cached_result(self, cache_file, output_file=None):
+        """Return a previously generated result (copying it to output_file), or None on a miss."""
+        if not cache_file.exists():
+            return None
+        log.info("[✓] Reusing cached result: %s", cache_file.name)
+        text = cache_file.read_text(encoding='utf-8')
+        if output_file:
+            write_atomic(output_file, text)
+        return text
+
+    def _store_cached_result(self, cache_file, text):
+        """Remember a finished, non-empty result under its input's content hash."""
+        if text:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(cache_file, text)
+
+    def _enable_context_cache(self):
+        """Keep the system instruction in an explicit context cache from the next request on."""
+        self._context_caching = True
+
+    def _needs_cache(self):
+        """Return True if a context cache should be created before the next request."""
+        if not self._context_caching or self._cache_disabled:
+            return False
+        return not (self._cache and time.monotonic() < self._cache_expires)
+
+    def _cache_config(self):
+        """Return the config for a context cache holding the system instruction."""
+        return self._types.CreateCachedContentConfig(
+            system_instruction=self._system_instruction(),
+            ttl=f"{CACHE_TTL_SECONDS}s",
+        )
+
+    def _cache_created(self, cache):
+        """Start using a newly created context cache."""
+        self._cache = cache
+        # Refresh a minute early so requests never reference an expired cache
+        self._cache_expires = time.monotonic() + CACHE_TTL_SECONDS - 60
+
+    def _cache_failed(self, error):
+        """Fall back to the inline instruction after caches.create failed."""
+        self._cache = None
+        # Only a rejected model or config (e.g. a prompt below the caching
+        # minimum) is permanent; anything else is retried on the next request
+        if getattr(error, 'code', None) in (400, 403, 404):
+            log.warning("[!] Context caching unavailable, sending system instruction inline: %s", error)
+            self._cache_disabled = True
+        else:
+            log.warning("[!] Could not create context cache, sending system instruction inline: %s", error)
+
+    def _cached_instruction(self):
+        """Return the name of a context cache holding the system instruction, or None."""
+        if self._needs_cache():
+            try:
+                self._cache_created(self.client.caches.create(model=self.model, config=self._cache_config()))
+            except self._errors.APIError as e:
+                self._cache_failed(e)
+        return self._cache.name if self._cache else None
+
+    async def _create_cache_async(self):
+        """Create the context cache with the async client; shared by every request waiting on it."""
+        try:
+            self._cache_created(await self.client.aio.caches.create(model=self.model, config=self._cache_config()))
+        except self._errors.APIError as e:
+            self._cache_failed(e)
+        finally:
+            self._cache_creation = None
+
+    async def _cached_instruction_async(self):
+        """
+        Async counterpart of _cached_instruction that never blocks the event loop.
+
+        Concurrent requests that find the cache missing or expired wait on a
+        single creation instead of each creating (and leaking) their own.
+        """
+        if self._needs_cache():
+            if self._cache_creation is None:
+                self._cache_creation = asyncio.ensure_future(self._create_cache_async())
+            # Shielded so one cancelled request does not abort the creation others wait on
+            await asyncio.shield(self._cache_creation)
+        return self._cache.name if self._cache else None
+
+    def close(self):
+        """Delete the server-side context cache now instead of paying for it until its TTL expires."""
+        if self._cache is None:
+            return
+        try:
+            self.client.caches.delete(name=self._cache.name)
+        except self._errors.APIError as e:
+            log.warning("[!] Could not delete context cache %s: %s", self._cache.name, e)
+        self._cache = None
+        self._cache_expires = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _forget_cache(self, cache_name):
+        """Stop referencing a context cache the server no longer has, so the next request recreates it."""
+        if self._cache is not None and self._cache.name == cache_name:
+            self._cache = None
+            self._cache_expires = 0.0
+
+    def _is_missing_cache(self, error, config):
+        """Return True if a request failed because its context cache was evicted or deleted server-side."""
+        # Gemini answers 404, or 403 "CachedContent not found (or permission denied)"
+        return bool(config.cached_content) and getattr(error, 'code', None) in (403, 404)
+
+    def _with_cache_retry(self, request):
+        """
+        Run request(config), recreating the context cache and retrying once if it has vanished.
+
+        The local TTL only tracks the lifetime requested at creation; the
+        server can still evict or delete the cache earlier.
+        """
+        config = self._generation_config()
+        try:
+            return request(config)
+        except self._errors.ClientError as e:
+            if not self._is_missing_cache(e, config):
+                raise
+            log.warning("[!] Context cache %s is gone, recreating it and retrying", config.cached_content)
+            self._forget_cache(config.cached_content)
+            return request(self._generation_config())
+
+    async def _with_cache_retry_async(self, request):
+        """Async counterpart of _with_cache_retry; request(config) returns an awaitable."""
+        config = await self._generation_config_async()
+        try:
+            return await request(config)
+        except self._errors.ClientError as e:
+            if not self._is_missing_cache(e, config):
+                raise
+            log.warning("[!] Context cache %s is gone, recreating it and retrying", config.cached_content)
+            self._forget_cache(config.cached_content)
+            return await request(await self._generation_config_async())
+
+    def _generation_config(self):
+        """Return the generation config (cached system instruction when available), rebuilt only when the cache changes."""
+        return self._config_for(self._cached_instruction())
+
+    async def _generation_config_async(self):
+        """Async counterpart of _generation_config; creates the context cache without blocking the event loop."""
+        return self._config_for(await self._cached_instruction_async())
+
+    def _config_for(self, cache_name):
+        """Return the generation config referencing cache_name (or the inline instruction when None)."""
+        if self._config is not None and self._config_cache_name == cache_name:
+            return self._config
+        if cache_name:
+            self._config = self._types.GenerateContentConfig(
+                temperature=self.temperature,
+                cached_content=cache_name,
+            )
+        else:
+            self._config = self._types.GenerateContentConfig(
+                temperature=self.temperature,
+                system_instruction=self._system_instruction(),
+            )
+        self._config_cache_name = cache_name
+        return self._config
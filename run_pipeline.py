@@ -7,76 +7,132 @@ Orchestrates: Video Download → Analysis → Sequence Generation
 import sys
 import os
 from pathlib import Path
-import subprocess
 
+from gemini_common import configure_logging
 
-def run_command(cmd, description):
-    """Run a command and handle errors."""
+VIDEO_EXTENSIONS = ('.mp4', '.mpeg', '.mov', '.avi', '.flv', '.mpg', '.webm', '.wmv', '.3gp')
+
+_BANNER = "\n".join([
+    "=" * 70,
+    "AI Video Reconstruction Pipeline",
+    "Video → Analysis → Sequences (First Frame + Last Frame + Motion)",
+    "=" * 70,
+])
+
+_HELP_TEXT = "\n".join([
+    "\nUsage:",
+    "  python run_pipeline.py <video_file_or_url>",
+    "\nDescription:",
+    "  Runs the complete pipeline:",
+    "  1. Downloads video (if URL provided)",
+    "  2. Analyzes video with Gemini 2.5 Pro",
+    "  3. Generates sequences with:",
+    "     • First Frame Image Prompts",
+    "     • Last Frame Image Prompts",
+    "     • Video Motion Prompts",
+    "\nExamples:",
+    "  python run_pipeline.py downloads/video.mp4",
+    "  python run_pipeline.py https://instagram.com/p/...",
+    "\nOutput:",
+    "  • Analysis report in reports/",
+    "  • Sequence prompts in sequences/",
+])
+
+_SUMMARY_TEMPLATE = "\n".join([
+    "\n" + "=" * 70,
+    "✓ PIPELINE COMPLETED SUCCESSFULLY!",
+    "=" * 70,
+    "\nGenerated Files:",
+    "  📄 Video Analysis: {analysis_name}",
+    "  🎬 Sequence Guide:  {sequences_name}",
+    "\n" + "=" * 70,
+    "Next Steps:",
+    "=" * 70,
+    "1. Open the sequence guide to review all sequences",
+    "2. For each sequence:",
+    "   a) Generate FIRST FRAME using text-to-image model",
+    "      (Use: Stable Diffusion, FLUX, Midjourney)",
+    "   b) Generate LAST FRAME using text-to-image model",
+    "   c) Generate VIDEO using image-to-video model",
+    "      (Use: Kling 2.5 Pro First Frame + Last Frame mode)",
+    "3. Concatenate all video sequences in order",
+    "4. Add audio/music if needed",
+    "=" * 70,
+    "\n📁 Files Location:",
+    "   Analysis: {analysis_path}",
+    "   Sequences: {sequences_path}",
+    "=" * 70,
+])
+
+
+def is_video_file(name):
+    """Return True if a filename has a supported video extension."""
+    return name.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def _latest_by_mtime(dir_path, predicate):
+    """Return the most recently modified file in dir_path whose name satisfies predicate, or None."""
+    with os.scandir(dir_path) as it:
+        best = max(
+            (entry for entry in it if entry.is_file() and predicate(entry.name)),
+            key=lambda entry: entry.stat().st_mtime,
+            default=None,
+        )
+    return Path(best.path) if best else None
+
+
+def print_stage(description):
+    """Print a banner announcing a pipeline stage."""
     print(f"\n{'='*70}")
     print(f"[*] {description}")
     print(f"{'='*70}")
-    
-    result = subprocess.run(cmd, shell=False)
-    
-    if result.returncode != 0:
-        print(f"[✗] Error: {description} failed with exit code {result.returncode}")
-        sys.exit(result.returncode)
-    
-    return result
 
 
 def main():
     """Main function to orchestrate the complete pipeline."""
-    print("=" * 70)
-    print("AI Video Reconstruction Pipeline")
-    print("Video → Analysis → Sequences (First Frame + Last Frame + Motion)")
-    print("=" * 70)
+    configure_logging()
+    sys.stdout.write(_BANNER + "\n")
     
     if len(sys.argv) < 2:
-        print("\nUsage:")
-        print("  python run_pipeline.py <video_file_or_url>")
-        print("\nDescription:")
-        print("  Runs the complete pipeline:")
-        print("  1. Downloads video (if URL provided)")
-        print("  2. Analyzes video with Gemini 2.5 Pro")
-        print("  3. Generates sequences with:")
-        print("     • First Frame Image Prompts")
-        print("     • Last Frame Image Prompts")
-        print("     • Video Motion Prompts")
-        print("\nExamples:")
-        print("  python run_pipeline.py downloads/video.mp4")
-        print("  python run_pipeline.py https://instagram.com/p/...")
-        print("\nOutput:")
-        print("  • Analysis report in reports/")
-        print("  • Sequence prompts in sequences/")
+        sys.stdout.write(_HELP_TEXT + "\n")
         sys.exit(1)
     
     input_arg = sys.argv[1]
     
-    # Get Python path from venv
-    python_path = "venv/bin/python" if Path("venv/bin/python").exists() else "python"
+    from video_analyzer import VideoAnalyzer, InvalidVideoError
+    from sequence_generator import SequenceGenerator
+    
+    # Build both Gemini stages now (sharing one client) so a missing API key or SDK
+    # fails before any download or Gemini spend
+    try:
+        analyzer = VideoAnalyzer()
+        generator = SequenceGenerator(client=analyzer.client)
+    except ValueError as e:
+        print(f"\n[✗] Configuration error: {e}")
+        sys.exit(1)
     
     # Step 1: Check if input is URL or file
     if input_arg.startswith('http://') or input_arg.startswith('https://'):
-        run_command(
-            [python_path, "video_downloader.py", input_arg],
-            "Step 1: Downloading video"
-        )
+        print_stage("Step 1: Downloading video")
+        from video_downloader import VideoDownloader
         
-        downloads_dir = Path("downloads")
-        if not downloads_dir.exists():
-            print("\n[✗] Error: Downloads directory not found")
+        with VideoDownloader() as downloader:
+            video_file = downloader.download_video(input_arg)
+        if not video_file:
+            print("\n[✗] Error: Video download failed")
             sys.exit(1)
         
-        video_files = sorted(downloads_dir.glob("*.mp4"), key=lambda x: x.stat().st_mtime, reverse=True)
-        if not video_files:
-            video_files = sorted(downloads_dir.glob("*.*"), key=lambda x: x.stat().st_mtime, reverse=True)
-        
-        if not video_files:
+        # Fall back to the newest file if yt-dlp reported a stale path
+        if not video_file.exists():
+            downloads_dir = downloader.output_dir
+            video_file = (
+                _latest_by_mtime(downloads_dir, lambda name: name.endswith(".mp4"))
+                or _latest_by_mtime(downloads_dir, is_video_file)
+            )
+        if not video_file:
             print("\n[✗] Error: No video file found after download")
             sys.exit(1)
         
-        video_file = video_files[0]
         print(f"\n[*] Using downloaded video: {video_file.name}")
     else:
         video_file = Path(input_arg)
@@ -85,64 +141,41 @@ def main():
             sys.exit(1)
         print(f"\n[*] Using video: {video_file.name}")
     
-    # Step 2: Analyze video
-    run_command(
-        [python_path, "video_analyzer.py", str(video_file)],
-        "Step 2: Analyzing video"
-    )
-    
-    # Find the most recent analysis file
-    reports_dir = Path("reports")
-    if not reports_dir.exists():
-        print("\n[✗] Error: Reports directory not found")
+    try:
+        # Step 2: Analyze video
+        print_stage("Step 2: Analyzing video")
+        latest_analysis = analyzer.report_path(video_file)
+        analyzer.analyze_video_file(video_file, latest_analysis)
+        print(f"\n[*] Saved analysis: {latest_analysis.name}")
+        
+        # Step 3: Generate sequences
+        print_stage("Step 3: Generating sequences with image and video prompts")
+        latest_sequences = generator.sequences_path(latest_analysis)
+        generator.generate_sequences(latest_analysis, latest_sequences)
+    except FileNotFoundError as e:
+        print(f"\n[✗] Error: {e}")
         sys.exit(1)
-    
-    analysis_files = sorted(reports_dir.glob("*_analysis_*.md"), key=lambda x: x.stat().st_mtime, reverse=True)
-    
-    if not analysis_files:
-        print("\n[✗] Error: No analysis file found")
+    except InvalidVideoError as e:
+        print(f"\n[✗] Invalid video: {e}")
         sys.exit(1)
+    except ValueError as e:
+        print(f"\n[✗] Configuration error: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[✗] Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        analyzer.close()
+        generator.close()
     
-    latest_analysis = analysis_files[0]
-    print(f"\n[*] Found analysis: {latest_analysis.name}")
-    
-    # Step 3: Generate sequences
-    run_command(
-        [python_path, "sequence_generator.py", str(latest_analysis)],
-        "Step 3: Generating sequences with image and video prompts"
-    )
-    
-    # Find the most recent sequences file
-    sequences_dir = Path("sequences")
-    if sequences_dir.exists():
-        sequence_files = sorted(sequences_dir.glob("*_sequences_*.md"), key=lambda x: x.stat().st_mtime, reverse=True)
-        if sequence_files:
-            latest_sequences = sequence_files[0]
-            
-            print("\n" + "=" * 70)
-            print("✓ PIPELINE COMPLETED SUCCESSFULLY!")
-            print("=" * 70)
-            print(f"\nGenerated Files:")
-            print(f"  📄 Video Analysis: {latest_analysis.name}")
-            print(f"  🎬 Sequence Guide:  {latest_sequences.name}")
-            print("\n" + "=" * 70)
-            print("Next Steps:")
-            print("=" * 70)
-            print("1. Open the sequence guide to review all sequences")
-            print("2. For each sequence:")
-            print("   a) Generate FIRST FRAME using text-to-image model")
-            print("      (Use: Stable Diffusion, FLUX, Midjourney)")
-            print("   b) Generate LAST FRAME using text-to-image model")
-            print("   c) Generate VIDEO using image-to-video model")
-            print("      (Use: Kling 2.5 Pro First Frame + Last Frame mode)")
-            print("3. Concatenate all video sequences in order")
-            print("4. Add audio/music if needed")
-            print("=" * 70)
-            print(f"\n📁 Files Location:")
-            print(f"   Analysis: {latest_analysis.absolute()}")
-            print(f"   Sequences: {latest_sequences.absolute()}")
-            print("=" * 70)
-
+    sys.stdout.write(_SUMMARY_TEMPLATE.format(
+        analysis_name=latest_analysis.name,
+        sequences_name=latest_sequences.name,
+        analysis_path=latest_analysis.absolute(),
+        sequences_path=latest_sequences.absolute(),
+    ) + "\n")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Batch Video-to-Sequences Pipeline
+Analyzes every video in a directory concurrently, then generates all sequence guides concurrently.
+"""
+
+import sys
+import os
+import asyncio
+from pathlib import Path
+from datetime import datetime
+
+from gemini_common import configure_logging
+from run_pipeline import is_video_file
+
+
+def _find_videos(dir_path):
+    """Return the video files directly inside dir_path, sorted by name."""
+    with os.scandir(dir_path) as it:
+        return sorted(
+            Path(entry.path) for entry in it
+            if entry.is_file() and is_video_file(entry.name)
+        )
+
+
+async def _run_batch(analyzer, generator, videos):
+    """Analyze all videos concurrently, then generate all sequence guides concurrently."""
+    # Step 1: Analyze every video
+    print(f"\n{'='*70}")
+    print(f"[*] Analyzing {len(videos)} video(s)")
+    print(f"{'='*70}")
+    analyses = await analyzer.analyze_many(videos)
+
+    reports = []
+    failed = 0
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for video, analysis in zip(videos, analyses):
+        if isinstance(analysis, Exception) or not analysis:
+            print(f"[✗] Analysis failed for {video.name}: {analysis or 'empty response'}")
+            failed += 1
+            continue
+        reports.append(analyzer.save_report(analysis, video, timestamp=timestamp))
+
+    # Step 2: Generate all sequence guides
+    print(f"\n{'='*70}")
+    print(f"[*] Generating sequences for {len(reports)} analysis report(s)")
+    print(f"{'='*70}")
+    results = await generator.generate_many(reports)
+    return reports, results, failed
+
+
+def main():
+    """Main function to run the pipeline over a directory of videos."""
+    configure_logging()
+    print("=" * 70)
+    print("AI Video Reconstruction Pipeline - Batch Mode")
+    print("=" * 70)
+
+    videos_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("downloads")
+    if not videos_dir.is_dir():
+        print(f"\n[✗] Error: Directory not found: {videos_dir}")
+        print("\nUsage:")
+        print("  python run_pipeline_batch.py [videos_dir]   (default: downloads/)")
+        sys.exit(1)
+
+    videos = _find_videos(videos_dir)
+    if not videos:
+        print(f"\n[✗] Error: No video files found in {videos_dir}")
+        sys.exit(1)
+
+    print(f"\n[*] Found {len(videos)} video(s) in {videos_dir}")
+
+    from video_analyzer import VideoAnalyzer
+    from sequence_generator import SequenceGenerator
+
+    try:
+        analyzer = VideoAnalyzer()
+        generator = SequenceGenerator(client=analyzer.client)
+    except ValueError as e:
+        print(f"\n[✗] Configuration error: {e}")
+        sys.exit(1)
+
+    try:
+        reports, results, failed = asyncio.run(_run_batch(analyzer, generator, videos))
+    finally:
+        analyzer.close()
+        generator.close()
+
+    successful = 0
+    for report, result in zip(reports, results):
+        if isinstance(result, Exception) or not result:
+            print(f"[✗] Sequence generation failed for {report.name}: {result or 'empty response'}")
+            failed += 1
+            continue
+        output_file = generator.save_sequences(result, report)
+        print(f"[✓] {report.name} → {output_file.name}")
+        successful += 1
+
+    print("\n" + "=" * 70)
+    print("Batch Summary:")
+    print(f"  Successful: {successful}")
+    print(f"  Failed: {failed}")
+    print(f"  Total: {len(videos)}")
+    print("=" * 70)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
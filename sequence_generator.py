@@ -7,42 +7,16 @@ based on video analysis reports.
 """
 
 import sys
-import os
+import asyncio
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
 
-try:
-    from google import genai
-    from google.genai import types
-except ImportError:
-    print("Error: google-genai is not installed.")
-    print("Please install it using: pip install google-genai")
-    sys.exit(1)
+from gemini_common import (CACHE_ROOT, ContextCachedModel, configure_logging, get_client, import_genai, resolve_api_key,
+                           stream_text, write_atomic)
 
-load_dotenv()
 
-
-class SequenceGenerator:
-    def __init__(self, api_key=None):
-        """
-        Initialize the sequence generator with Gemini 2.5 Pro.
-        
-        Args:
-            api_key: Gemini API key (defaults to GEMINI_API_KEY env var)
-        """
-        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found. Set it in .env file or pass it directly.")
-        
-        self.client = genai.Client(api_key=self.api_key)
-        self.model = "gemini-2.5-pro"
-        # Fixed temperature set in code (no env/CLI override)
-        self.temperature = 0.1
-        
-    def _create_sequence_prompt(self):
-        """Create the ultra-optimized prompt for AI model generation (t2i + i2v reconstruction)."""
-        return """
+# System instruction sent with every sequence generation request
+_SEQUENCE_SYSTEM_INSTRUCTION = """
 You are an ULTRA-OPTIMIZED video reconstruction prompt generator. Transform the provided ultra-comprehensive analysis into MODEL-SPECIFIC, FIDELITY-MAXIMIZING prompts for text-to-image and image-to-video AI systems.
 
 MISSION
@@ -354,16 +328,34 @@ WRITING GUIDELINES
 Now analyze the video analysis report and generate the complete sequence breakdown using the Smart Frame Strategy and the prompt formulas above.
 """
 
-    def generate_sequences(self, analysis_file_path):
+
+class SequenceGenerator(ContextCachedModel):
+    def __init__(self, api_key=None, client=None):
         """
-        Generate sequences with image and video prompts from an analysis file.
+        Initialize the sequence generator with Gemini 2.5 Pro.
         
         Args:
-            analysis_file_path: Path to the video analysis Markdown file
-            
-        Returns:
-            str: Generated sequences in Markdown format
+            api_key: Gemini API key (defaults to GEMINI_API_KEY env var)
+            client: Existing genai.Client to reuse (created from api_key if omitted)
         """
+        self.api_key = api_key or resolve_api_key()
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not found. Set it in .env file or pass it directly.")
+        
+        _, self._types, self._errors = import_genai()
+        self.client = client or get_client(self.api_key)
+        self.model = "gemini-2.5-pro"
+        # Fixed temperature set in code (no env/CLI override)
+        self.temperature = 0.1
+        # Local memoization of generated sequences keyed by input hash
+        self.result_cache_dir = CACHE_ROOT / "sequences"
+        
+    def _system_instruction(self):
+        """Create the ultra-optimized prompt for AI model generation (t2i + i2v reconstruction)."""
+        return _SEQUENCE_SYSTEM_INSTRUCTION
+
+    def _read_analysis(self, analysis_file_path):
+        """Read an analysis report as raw bytes, raising FileNotFoundError if it is missing."""
         analysis_file_path = Path(analysis_file_path)
         
         if not analysis_file_path.exists():
@@ -371,35 +363,127 @@ Now analyze the video analysis report and generate the complete sequence breakdo
         
         print(f"[*] Reading analysis: {analysis_file_path.name}")
         
-        with open(analysis_file_path, 'r', encoding='utf-8') as f:
-            analysis_content = f.read()
+        analysis_bytes = analysis_file_path.read_bytes()
         
-        print(f"[*] Analysis length: {len(analysis_content)} characters")
+        print(f"[*] Analysis length: {len(analysis_bytes)} bytes")
         print("[*] Generating sequences with Gemini 2.5 Pro...")
+        return analysis_bytes
+    
+    def _analysis_contents(self, analysis_bytes):
+        """Wrap the raw report bytes as request parts without decoding them to str."""
+        return [
+            self._types.Part.from_text(text="VIDEO ANALYSIS REPORT:\n\n"),
+            self._types.Part.from_bytes(data=analysis_bytes, mime_type="text/plain"),
+        ]
+    
+    def generate_sequences(self, analysis_file_path, output_file=None, use_cache=True):
+        """
+        Generate sequences with image and video prompts from an analysis file.
+        
+        The response is streamed from Gemini; when output_file is given, each
+        chunk is written to output_file + ".tmp" as soon as it arrives and the
+        temp file replaces output_file once complete. Results are memoized on
+        disk, so an identical report is only sent to Gemini once.
+        
+        Args:
+            analysis_file_path: Path to the video analysis Markdown file
+            output_file: Optional path to stream the sequences into (via a .tmp file)
+            use_cache: Reuse a memoized result for identical input if available
+            
+        Returns:
+            str: Generated sequences in Markdown format
+        """
+        analysis_bytes = self._read_analysis(analysis_file_path)
+        cache_file = self._result_cache_path(analysis_bytes)
+        if use_cache:
+            sequences = self._load_cached_result(cache_file, output_file)
+            if sequences is not None:
+                return sequences
+        
         print("    This may take 1-2 minutes for detailed sequence breakdown...")
         
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=[f"VIDEO ANALYSIS REPORT:\n\n{analysis_content}"] ,
-            config=types.GenerateContentConfig(
-                temperature=self.temperature,
-                system_instruction=self._create_sequence_prompt(),
+        contents = self._analysis_contents(analysis_bytes)
+        
+        def request(config):
+            stream = self.client.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=config,
+            )
+            return stream_text(stream, output_file)
+        
+        sequences = self._with_cache_retry(request)
+        self._store_cached_result(cache_file, sequences)
+        return sequences
+    
+    async def generate_sequences_async(self, analysis_file_path, use_cache=True):
+        """
+        Generate sequences for one analysis file using the async Gemini client.
+        
+        Args:
+            analysis_file_path: Path to the video analysis Markdown file
+            use_cache: Reuse a memoized result for identical input if available
+            
+        Returns:
+            str: Generated sequences in Markdown format
+        """
+        analysis_bytes = self._read_analysis(analysis_file_path)
+        cache_file = self._result_cache_path(analysis_bytes)
+        if use_cache:
+            sequences = self._load_cached_result(cache_file)
+            if sequences is not None:
+                return sequences
+        
+        contents = self._analysis_contents(analysis_bytes)
+        response = await self._with_cache_retry_async(
+            lambda config: self.client.aio.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config,
             )
         )
         
-        return response.text
+        # response.text is None when the response was blocked or empty; match the sync path's ""
+        sequences = response.text or ""
+        self._store_cached_result(cache_file, sequences)
+        return sequences
     
-    def save_sequences(self, sequences, original_analysis_path, output_dir="sequences"):
+    async def generate_many(self, analysis_file_paths, concurrency=8, use_cache=True):
         """
-        Save the generated sequences to a Markdown file.
+        Generate sequences for several analysis files concurrently.
+        
+        Args:
+            analysis_file_paths: Paths to video analysis Markdown files
+            concurrency: Maximum number of in-flight Gemini requests
+            use_cache: Reuse memoized results for identical inputs if available
+            
+        Returns:
+            list: Sequences text (or the raised exception) for each path, in order
+        """
+        analysis_file_paths = list(analysis_file_paths)
+        if len(analysis_file_paths) > 1:
+            self._enable_context_cache()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def generate_one(path):
+            async with semaphore:
+                return await self.generate_sequences_async(path, use_cache)
+        
+        return await asyncio.gather(
+            *(generate_one(path) for path in analysis_file_paths),
+            return_exceptions=True,
+        )
+    
+    def sequences_path(self, original_analysis_path, output_dir="sequences"):
+        """
+        Build a timestamped output path for a sequences file.
         
         Args:
-            sequences: The generated sequences text
             original_analysis_path: Original analysis file path
             output_dir: Directory to save sequence files
             
         Returns:
-            Path: Path to the saved sequences file
+            Path: Path where the sequences file should be written
         """
         output_dir = Path(output_dir)
         output_dir.mkdir(exist_ok=True)
@@ -411,65 +495,98 @@ Now analyze the video analysis report and generate the complete sequence breakdo
             base_name = analysis_name
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = output_dir / f"{base_name}_sequences_{timestamp}.md"
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(sequences)
+        return output_dir / f"{base_name}_sequences_{timestamp}_{next(self._output_counter)}.md"
+    
+    def save_sequences(self, sequences, original_analysis_path, output_dir="sequences"):
+        """
+        Save the generated sequences to a Markdown file.
         
+        Args:
+            sequences: The generated sequences text
+            original_analysis_path: Original analysis file path
+            output_dir: Directory to save sequence files
+            
+        Returns:
+            Path: Path to the saved sequences file
+        """
+        output_file = self.sequences_path(original_analysis_path, output_dir)
+        write_atomic(output_file, sequences)
         return output_file
 
+_BANNER = "\n".join([
+    "=" * 70,
+    "Video Sequence Generator - Powered by Gemini 2.5 Pro",
+    "Generate Smart Frames (Anchor or First+Last) + Motion Prompts",
+    "=" * 70,
+])
+
+_HELP_TEXT = "\n".join([
+    "\nUsage:",
+    "  python sequence_generator.py <analysis_file.md> [--no-cache]",
+    "\nDescription:",
+    "  Generates sequences with image and video prompts from analysis:",
+    "    • First Frame Image Prompt (for text-to-image models)",
+    "    • Last Frame Image Prompt (for text-to-image models)",
+    "    • Video Motion Prompt (for image-to-video models)",
+    "\nExamples:",
+    "  python sequence_generator.py reports/video_analysis_20240101.md",
+    "\nOptions:",
+    "  --no-cache    Regenerate even if identical input was processed before",
+    "\nSupported formats:",
+    "  Markdown (.md) analysis files",
+    "\nOutput:",
+    "  Sequence guide saved to 'sequences/' directory",
+    "\nOptimized for:",
+    "  Kling 2.5 Pro (First Frame + Last Frame mode)",
+    "  Compatible with Runway, Pika, Sora, and other i2v models",
+])
+
+_SUMMARY_TEMPLATE = "\n".join([
+    "\n" + "=" * 70,
+    "[✓] Sequence generation completed successfully!",
+    "[✓] Sequences saved to: {output_path}",
+    "[i] Model: {model} | Temperature: {temperature}",
+    "=" * 70,
+    "\nNext Steps:",
+    "  1. Review the sequence breakdown",
+    "  2. Generate first frames using text-to-image models",
+    "  3. Generate last frames using text-to-image models",
+    "  4. Use image-to-video models to generate motion",
+    "  5. Concatenate all sequences to reconstruct the video",
+    "=" * 70,
+    "\nSequence Preview:",
+    "-" * 70,
+    "{preview}",
+    "-" * 70,
+])
+
 
 def main():
     """Main function to handle command-line usage."""
-    print("=" * 70)
-    print("Video Sequence Generator - Powered by Gemini 2.5 Pro")
-    print("Generate Smart Frames (Anchor or First+Last) + Motion Prompts")
-    print("=" * 70)
+    configure_logging()
+    sys.stdout.write(_BANNER + "\n")
+    
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    use_cache = len(args) == len(sys.argv) - 1
     
-    if len(sys.argv) < 2:
-        print("\nUsage:")
-        print("  python sequence_generator.py <analysis_file.md>")
-        print("\nDescription:")
-        print("  Generates sequences with image and video prompts from analysis:")
-        print("    • First Frame Image Prompt (for text-to-image models)")
-        print("    • Last Frame Image Prompt (for text-to-image models)")
-        print("    • Video Motion Prompt (for image-to-video models)")
-        print("\nExamples:")
-        print("  python sequence_generator.py reports/video_analysis_20240101.md")
-        print("\nSupported formats:")
-        print("  Markdown (.md) analysis files")
-        print("\nOutput:")
-        print("  Sequence guide saved to 'sequences/' directory")
-        print("\nOptimized for:")
-        print("  Kling 2.5 Pro (First Frame + Last Frame mode)")
-        print("  Compatible with Runway, Pika, Sora, and other i2v models")
+    if not args:
+        sys.stdout.write(_HELP_TEXT + "\n")
         sys.exit(1)
     
-    analysis_file = sys.argv[1]
+    analysis_file = args[0]
     
     try:
-        generator = SequenceGenerator()
-        
-        sequences = generator.generate_sequences(analysis_file)
-        
-        output_file = generator.save_sequences(sequences, analysis_file)
+        with SequenceGenerator() as generator:
+            output_file = generator.sequences_path(analysis_file)
+            sequences = generator.generate_sequences(analysis_file, output_file, use_cache=use_cache)
         
-        print("\n" + "=" * 70)
-        print("[✓] Sequence generation completed successfully!")
-        print(f"[✓] Sequences saved to: {output_file.absolute()}")
-        print(f"[i] Model: {generator.model} | Temperature: {generator.temperature}")
-        print("=" * 70)
-        print("\nNext Steps:")
-        print("  1. Review the sequence breakdown")
-        print("  2. Generate first frames using text-to-image models")
-        print("  3. Generate last frames using text-to-image models")
-        print("  4. Use image-to-video models to generate motion")
-        print("  5. Concatenate all sequences to reconstruct the video")
-        print("=" * 70)
-        print("\nSequence Preview:")
-        print("-" * 70)
-        print(sequences[:800] + "..." if len(sequences) > 800 else sequences)
-        print("-" * 70)
+        preview = sequences[:800] + "..." if len(sequences) > 800 else sequences
+        sys.stdout.write(_SUMMARY_TEMPLATE.format(
+            output_path=output_file.absolute(),
+            model=generator.model,
+            temperature=generator.temperature,
+            preview=preview,
+        ) + "\n")
         
     except FileNotFoundError as e:
         print(f"\n[✗] Error: {e}")
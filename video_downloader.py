@@ -7,7 +7,12 @@ Downloads videos from Instagram, Twitter, and other supported platforms.
 import sys
 import os
 import shutil
+import functools
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 
 try:
     import yt_dlp
@@ -17,6 +22,68 @@ except ImportError:
     sys.exit(1)
 
 
+def _env_int(name, default):
+    """Read a positive integer setting from the environment, warning and falling back to default if malformed."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        print(f"[!] Ignoring {name}={value!r} (expected a positive integer), using {default}")
+        return default
+    return parsed
+
+
+# Parallel downloads for download_multiple (override with --workers or VDL_WORKERS)
+DEFAULT_WORKERS = _env_int("VDL_WORKERS", 4)
+# Parallel fragment fetches within one HLS/DASH download (override with VDL_FRAG_WORKERS)
+FRAGMENT_WORKERS = _env_int("VDL_FRAG_WORKERS", 5)
+
+# Format selection ensuring audio is ALWAYS included:
+# With ffmpeg: Download best video + best audio separately, then merge
+# Without ffmpeg: Download best single file that contains both video and audio
+#
+# Format string breakdown:
+# - bestvideo[ext=mp4]+bestaudio[ext=m4a]: Best MP4 video + best M4A audio (merged)
+# - bestvideo+bestaudio: Best video + best audio in any format (merged)
+# - best[height<=?1080]: Best single format up to 1080p (with audio)
+# - best: Absolute fallback - best available format
+_FMT_BEST_MERGE = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best[height<=?1080]/best'
+
+# Progressive format: Single file with both video and audio (no merging needed)
+# - [acodec!=none]: Ensures audio codec is present (not a silent video)
+_FMT_PROGRESSIVE = 'best[ext=mp4][acodec!=none]/best[height<=?1080][acodec!=none]/best'
+
+# Add a common User-Agent in case some CDNs are picky
+_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+# yt-dlp options shared by every download; paths, format and cookies are added per downloader
+_BASE_OPTS = MappingProxyType({
+    'prefer_ffmpeg': True,
+    'noplaylist': True,
+    # yt-dlp's own printer writes every progress tick; _on_progress reports instead
+    'quiet': True,
+    'noprogress': True,
+    'no_warnings': False,
+    'ignoreerrors': True,
+    'keepvideo': False,
+    # Fetch HLS/DASH fragments in parallel and retry flaky ones instead of the whole video
+    'concurrent_fragment_downloads': FRAGMENT_WORKERS,
+    'http_chunk_size': 10 * 1024 * 1024,
+    'retries': 3,
+    'fragment_retries': 5,
+})
+
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_available() -> bool:
+    """Return True if ffmpeg is available on PATH (looked up once per process)."""
+    return shutil.which("ffmpeg") is not None
+
+
 class VideoDownloader:
     def __init__(self, output_dir="downloads"):
         """
@@ -31,53 +98,64 @@ class VideoDownloader:
         self.cookies_browser = os.getenv('YTDLP_COOKIES_FROM_BROWSER')  # e.g., 'chrome', 'firefox'
         self.cookies_profile = os.getenv('YTDLP_COOKIES_PROFILE')       # e.g., 'Default'
         self.cookies_file = os.getenv('YTDLP_COOKIES_FILE')             # path to Netscape cookies.txt
+        # yt-dlp options, built on first download and shared by every later one
+        self._ydl_opts = None
+        # One YoutubeDL per thread, reused across that thread's downloads and
+        # closed together by close()
+        self._local = threading.local()
+        self._open_ydls = contextlib.ExitStack()
+        self._open_ydls_lock = threading.Lock()
+        # Last whole percentage printed per file being downloaded
+        self._last_pct = {}
         
-    def _ffmpeg_available(self) -> bool:
-        """Return True if ffmpeg is available on PATH."""
-        return shutil.which("ffmpeg") is not None
+    def _downloaded_path(self, ydl, info):
+        """Return the final on-disk path of a downloaded video."""
+        requested = info.get('requested_downloads') or []
+        if requested and requested[-1].get('filepath'):
+            return Path(requested[-1]['filepath'])
+        return Path(ydl.prepare_filename(info))
 
-    def download_video(self, url):
+    def _on_progress(self, d):
+        """yt-dlp progress hook that prints at most once per whole percent."""
+        filename = d.get('filename')
+        if d['status'] != 'downloading':
+            self._last_pct.pop(filename, None)
+            return
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        if not total:
+            return
+        pct = int(d.get('downloaded_bytes', 0) * 100 / total)
+        if pct != self._last_pct.get(filename):
+            self._last_pct[filename] = pct
+            print(f"    {pct:3d}% {os.path.basename(filename or '')}")
+
+    def _build_opts(self):
         """
-        Download a video from the given URL with original audio.
+        Return the yt-dlp options for this downloader, building them on first use.
         
-        Args:
-            url: The URL of the video to download
-            
         Returns:
-            bool: True if download was successful, False otherwise
+            dict: Options passed to yt_dlp.YoutubeDL
         """
+        if self._ydl_opts is not None:
+            return self._ydl_opts
+        
         # Check if ffmpeg is available for merging video+audio streams
-        ffmpeg_ok = self._ffmpeg_available()
+        ffmpeg_ok = _ffmpeg_available()
         if not ffmpeg_ok:
             print("[!] ffmpeg not found on PATH. Falling back to progressive formats.")
             print("    Install ffmpeg to merge separate video+audio for best quality.")
 
-        # Format selection ensuring audio is ALWAYS included:
-        # With ffmpeg: Download best video + best audio separately, then merge
-        # Without ffmpeg: Download best single file that contains both video and audio
-        #
-        # Format string breakdown:
-        # - bestvideo[ext=mp4]+bestaudio[ext=m4a]: Best MP4 video + best M4A audio (merged)
-        # - bestvideo+bestaudio: Best video + best audio in any format (merged)
-        # - best[height<=?1080]: Best single format up to 1080p (with audio)
-        # - best: Absolute fallback - best available format
-        fmt_best_merge = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best[height<=?1080]/best'
-        
-        # Progressive format: Single file with both video and audio (no merging needed)
-        # - [acodec!=none]: Ensures audio codec is present (not a silent video)
-        fmt_progressive = 'best[ext=mp4][acodec!=none]/best[height<=?1080][acodec!=none]/best'
-
         ydl_opts = {
-            'outtmpl': str(self.output_dir / '%(title)s.%(ext)s'),
-            'format': fmt_best_merge if ffmpeg_ok else fmt_progressive,
-            'prefer_ffmpeg': True,
-            'noplaylist': True,
-            'quiet': False,
-            'no_warnings': False,
-            'ignoreerrors': True,
-            'keepvideo': False,
-            # Add a common User-Agent in case some CDNs are picky
-            'http_headers': {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'},
+            **_BASE_OPTS,
+            'outtmpl': '%(title)s.%(ext)s',
+            # Stage fragments and merge inputs beside the downloads so the final
+            # move is a same-filesystem rename rather than a cross-device copy
+            'paths': {'home': str(self.output_dir), 'temp': str(self.output_dir / '.tmp')},
+            'format': _FMT_BEST_MERGE if ffmpeg_ok else _FMT_PROGRESSIVE,
+            # Keep yt-dlp's player-JS / signature cache with the downloads so reruns skip refetching it
+            'cachedir': str(self.output_dir / '.yt-dlp-cache'),
+            'http_headers': {'User-Agent': _USER_AGENT},
+            'progress_hooks': [self._on_progress],
         }
         # Attach cookies if configured
         if self.cookies_browser:
@@ -88,48 +166,95 @@ class VideoDownloader:
         if self.cookies_file:
             ydl_opts['cookiefile'] = self.cookies_file
         
-        # Configure ffmpeg post-processing to ensure audio is properly embedded
+        # Configure ffmpeg post-processing to ensure audio is properly embedded.
+        # Merges already produce mp4; the remuxer only stream-copies other
+        # containers into mp4 (and skips files that are mp4 already) instead
+        # of re-encoding every download like FFmpegVideoConvertor did.
         if ffmpeg_ok:
             ydl_opts['merge_output_format'] = 'mp4'
             ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegVideoConvertor',
+                'key': 'FFmpegVideoRemuxer',
                 'preferedformat': 'mp4',
             }]
         
+        self._ydl_opts = ydl_opts
+        return ydl_opts
+
+    def _get_ydl(self):
+        """
+        Return this thread's YoutubeDL, creating it on first use.
+        
+        Reusing an instance keeps extractors initialized, browser cookies
+        decrypted once, and HTTP connections alive between URLs; one per
+        thread because an instance is not safe to share between concurrent
+        extractions.
+        """
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            # Copy so one YoutubeDL's option tweaks never leak into another's
+            ydl = yt_dlp.YoutubeDL(dict(self._build_opts()))
+            with self._open_ydls_lock:
+                self._open_ydls.enter_context(ydl)
+            self._local.ydl = ydl
+        return ydl
+
+    def close(self):
+        """Close every YoutubeDL opened by this downloader (saving cookies, releasing connections)."""
+        with self._open_ydls_lock:
+            self._open_ydls.close()
+            self._open_ydls = contextlib.ExitStack()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def download_video(self, url):
+        """
+        Download a video from the given URL with original audio.
+        
+        Args:
+            url: The URL of the video to download
+            
+        Returns:
+            Path: Path to the downloaded video, or None if the download failed
+        """
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                print(f"\n[+] Downloading from: {url}")
-                info = ydl.extract_info(url, download=True)
-                if info:
-                    print(f"[✓] Successfully downloaded: {info.get('title', 'Unknown')}")
-                    return True
-                else:
-                    print(f"[✗] Failed to download from: {url}")
-                    return False
+            ydl = self._get_ydl()
+            print(f"\n[+] Downloading from: {url}")
+            info = ydl.extract_info(url, download=True)
+            if info:
+                print(f"[✓] Successfully downloaded: {info.get('title', 'Unknown')}")
+                return self._downloaded_path(ydl, info)
+            else:
+                print(f"[✗] Failed to download from: {url}")
+                return None
         except Exception as e:
             print(f"[✗] Error downloading {url}: {str(e)}")
-            return False
+            return None
     
-    def download_multiple(self, urls):
+    def download_multiple(self, urls, workers=DEFAULT_WORKERS):
         """
-        Download multiple videos from a list of URLs.
+        Download multiple videos from a list of URLs in parallel.
+        
+        Each worker thread reuses its own YoutubeDL instance for all the URLs
+        it handles (see _get_ydl).
         
         Args:
             urls: List of URLs to download
+            workers: Maximum number of simultaneous downloads
             
         Returns:
             tuple: (successful_count, failed_count)
         """
-        successful = 0
-        failed = 0
-        
-        for url in urls:
-            if self.download_video(url):
-                successful += 1
-            else:
-                failed += 1
+        self._build_opts()  # build (and report on ffmpeg) once, before the workers start
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(self.download_video, urls))
         
-        return successful, failed
+        successful = sum(1 for path in results if path)
+        return successful, len(results) - successful
 
 
 def main():
@@ -144,6 +269,7 @@ def main():
         print("  Single URL:    python video_downloader.py <URL>")
         print("  Multiple URLs: python video_downloader.py <URL1> <URL2> <URL3>...")
         print("  From file:     python video_downloader.py --file urls.txt")
+        print(f"  Parallelism:   python video_downloader.py --workers 8 <URL1> <URL2>...  (default: {DEFAULT_WORKERS})")
         print("\nExamples:")
         print("  python video_downloader.py https://www.instagram.com/p/...")
         print("  python video_downloader.py https://twitter.com/user/status/...")
@@ -156,21 +282,43 @@ def main():
     
     downloader = VideoDownloader()
     urls = []
+    args = sys.argv[1:]
     
-    if sys.argv[1] == "--file":
-        if len(sys.argv) < 3:
+    workers = DEFAULT_WORKERS
+    if "--workers" in args:
+        i = args.index("--workers")
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            print("[✗] Error: --workers needs a number")
+            sys.exit(1)
+        del args[i:i + 2]
+    
+    if not args:
+        print("[✗] No URLs provided")
+        sys.exit(1)
+    
+    if args[0] == "--file":
+        if len(args) < 2:
             print("[✗] Error: Please specify the file path")
             sys.exit(1)
         
-        file_path = sys.argv[2]
+        file_path = args[1]
         try:
-            with open(file_path, 'r') as f:
-                urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = (line.strip() for line in f)
+                urls = [line for line in lines if line and not line.startswith('#')]
         except FileNotFoundError:
             print(f"[✗] Error: File '{file_path}' not found")
             sys.exit(1)
     else:
-        urls = sys.argv[1:]
+        urls = args
+    
+    # Hand-maintained lists often repeat URLs; download each one once, keeping order
+    unique_urls = list(dict.fromkeys(urls))
+    if len(unique_urls) < len(urls):
+        print(f"[*] Skipping {len(urls) - len(unique_urls)} duplicate URL(s)")
+    urls = unique_urls
     
     if not urls:
         print("[✗] No URLs provided")
@@ -180,14 +328,16 @@ def main():
     print(f"[*] Output directory: {downloader.output_dir.absolute()}\n")
     
     if len(urls) == 1:
-        success = downloader.download_video(urls[0])
+        with downloader:
+            success = downloader.download_video(urls[0])
         if success:
             print("\n[✓] Download completed!")
         else:
             print("\n[✗] Download failed!")
             sys.exit(1)
     else:
-        successful, failed = downloader.download_multiple(urls)
+        with downloader:
+            successful, failed = downloader.download_multiple(urls, workers=workers)
         print("\n" + "=" * 60)
         print(f"Download Summary:")
         print(f"  Successful: {successful}")